@@ -21,7 +21,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from topk_client import buscar_topk_multi
-from llm_client import gerar_resposta
+from llm_client import RESPOSTA_SEM_BASE, gerar_resposta_stream
 from dedup import Dedup
 from synonyms import expand_query
 
@@ -62,6 +62,8 @@ dedup = Dedup(ttl=600)
 # =========================
 WA_MAX = 4096          # limite duro da Cloud API
 WA_SAFE = 3900         # margem de segurança pra evitar erro por variações
+# streaming: só descarrega em quebra de parágrafo depois de juntar isso (evita rate limit)
+WA_STREAM_MIN = int(os.getenv("WA_STREAM_MIN_CHARS", "600"))
 
 # =========================
 # CONTROLE DE JOBS (evita duplicar geração)
@@ -261,6 +263,57 @@ def enviar_relatorios_por_dia_whatsapp(phone_id: str, to: str, texto: str):
             enviar_whatsapp(phone_id, to, p + sufixo)
 
 
+def enviar_whatsapp_stream(phone_id: str, to: str, partes) -> str:
+    """
+    Envia a resposta do LLM enquanto ela é gerada.
+    Acumula os deltas e descarrega em quebras de parágrafo (após WA_STREAM_MIN chars),
+    sem nunca passar de WA_SAFE por mensagem. Retorna o texto completo.
+    """
+    enviados = []
+    pendente = ""
+
+    def _flush(texto: str):
+        for p in chunk_text_max(texto, max_len=WA_SAFE):
+            if p:
+                enviar_whatsapp(phone_id, to, p)
+
+    for delta in partes:
+        pendente += delta
+        enviados.append(delta)
+        if len(pendente) < WA_STREAM_MIN:
+            continue
+
+        corte = pendente.rfind("\n\n")
+        if corte <= 0:
+            if len(pendente) < WA_SAFE:
+                continue
+            corte = pendente.rfind("\n")
+            if corte <= 0:
+                corte = WA_SAFE
+
+        _flush(pendente[:corte])
+        pendente = pendente[corte:]
+
+    if pendente.strip():
+        _flush(pendente)
+
+    return "".join(enviados).strip()
+
+
+def responder_com_llm(phone_id: str, to: str, pergunta: str, resultados) -> str:
+    """Gera (streaming) e envia a resposta normativa."""
+    try:
+        resposta = enviar_whatsapp_stream(
+            phone_id, to, gerar_resposta_stream(pergunta, resultados)
+        )
+    except Exception as e:
+        log.error(f"[LLM] Erro ao gerar resposta: {e}", exc_info=True)
+        resposta = "Erro ao gerar resposta."
+        enviar_whatsapp(phone_id, to, resposta)
+
+    return resposta
+
+
 # =========================
 # EXTRATOR: carregar teste_v21.py com mensagens claras
 # =========================
@@ -627,11 +680,10 @@ def webhook():
     resultados = buscar_topk_multi(query, k=5)
 
     if not resultados:
-        enviar_whatsapp(phone_id, from_, "Não encontrei base normativa para responder sua pergunta.")
+        enviar_whatsapp(phone_id, from_, RESPOSTA_SEM_BASE)
         return jsonify({"ok": True}), 200
 
-    resposta = gerar_resposta(text, resultados)
-    enviar_whatsapp(phone_id, from_, resposta)
+    responder_com_llm(phone_id, from_, text, resultados)
 
     return jsonify({"ok": True}), 200
 
@@ -731,11 +783,10 @@ def simulate_message():
         resultados = buscar_topk_multi(query, k=5)
 
         if not resultados:
-            enviar_whatsapp(phone_id, from_, "Não encontrei base normativa para responder sua pergunta.")
+            enviar_whatsapp(phone_id, from_, RESPOSTA_SEM_BASE)
             return jsonify({"success": True, "from": from_, "no_results": True}), 200
 
-        resposta = gerar_resposta(text, resultados)
-        enviar_whatsapp(phone_id, from_, resposta)
+        resposta = responder_com_llm(phone_id, from_, text, resultados)
 
         return jsonify({"success": True, "from": from_, "response_sent": True, "response_length": len(resposta)}), 200
 
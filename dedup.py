@@ -1,9 +1,6 @@
-import redis
-import os
-
-REDIS_URL = os.getenv("REDIS_URL")
-
-redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+# mesmo pool limitado e bloqueante da memória (memory_redis._client):
+# um só conjunto de conexões por processo, URL ou host/porta/SSL
+from memory_redis import r as redis_client
 
 class Dedup:
     def __init__(self, ttl=3600):
@@ -15,11 +12,10 @@ class Dedup:
 
         key = f"dedup:{msg_id}"
 
-        # SETNX = só cria se não existir
-        was_set = redis_client.setnx(key, "1")
+        # SET NX EX = só cria se não existir, já com TTL (um comando, atômico)
+        was_set = redis_client.set(key, "1", nx=True, ex=self.ttl if self.ttl > 0 else None)
 
         if was_set:
-            redis_client.expire(key, self.ttl)
             return False  # NÃO visto ainda
 
         return True  # JÁ foi processado
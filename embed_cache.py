@@ -0,0 +1,125 @@
+# embed_cache.py
+# -*- coding: utf-8 -*-
+"""
+Cache local de embeddings (SQLite + LRU em processo).
+
+- Chave: SHA-256 do texto
+- Valor: vetor float32 serializado (BLOB)
+- Textos repetidos não voltam a chamar a API de embeddings
+- Opcional (EMBED_BATCH_MAX > 1): misses concorrentes agrupados em uma chamada /embeddings
+"""
+
+import os
+import time
+import queue
+import hashlib
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+from llm_client import client
+
+EMBED_MODEL = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small")
+EMBED_CACHE_PATH = os.getenv(
+    "EMBED_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "embed_cache.sqlite3"),
+)
+
+# agrupamento só faz sentido com requisições concorrentes (gunicorn com threads/gevent);
+# com EMBED_BATCH_MAX=1 (padrão) cada miss chama a API direto, sem fila nem thread
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "1"))
+# espera por outros pedidos antes de enviar; 0 = só junta o que já está na fila
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "0"))
+EMBED_TIMEOUT = float(os.getenv("EMBED_TIMEOUT", "30"))
+
+_lock = threading.Lock()
+_conn = sqlite3.connect(EMBED_CACHE_PATH, check_same_thread=False)
+_conn.execute("CREATE TABLE IF NOT EXISTS e (sha BLOB PRIMARY KEY, vec BLOB NOT NULL)")
+_conn.commit()
+
+class EmbedBatcher:
+    """Junta pedidos de embedding de várias threads numa só requisição à API."""
+
+    def __init__(self, max_batch: int, max_wait_ms: float) -> None:
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._q: "queue.SimpleQueue[Tuple[str, Future]]" = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self._loop, name="embed-batcher", daemon=True)
+        self._worker.start()
+
+    def embed(self, text: str) -> np.ndarray:
+        fut: Future = Future()
+        self._q.put((text, fut))
+        return fut.result(timeout=EMBED_TIMEOUT)
+
+    def _coletar(self) -> List[Tuple[str, Future]]:
+        items = [self._q.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch:
+            restante = deadline - time.monotonic()
+            try:
+                items.append(self._q.get(timeout=restante) if restante > 0 else self._q.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _enviar(self, items: List[Tuple[str, Future]]) -> None:
+        try:
+            dados = _embed_api([t for t, _ in items])
+            for (_, fut), vec in zip(items, dados):
+                fut.set_result(vec)
+        except Exception as e:
+            if len(items) > 1:
+                # uma entrada inválida não derruba o lote inteiro: repete uma a uma
+                for item in items:
+                    if not item[1].done():
+                        self._enviar([item])
+                return
+            for _, fut in items:
+                if not fut.done():
+                    fut.set_exception(e)
+        # resposta com menos linhas que entradas: ninguém fica esperando para sempre
+        for _, fut in items:
+            if not fut.done():
+                fut.set_exception(RuntimeError("embedding ausente na resposta da API"))
+
+    def _loop(self) -> None:
+        while True:
+            items = self._coletar()
+            try:
+                self._enviar(items)
+            except Exception as e:
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+def _embed_api(textos: List[str]) -> List[np.ndarray]:
+    resp = client.embeddings.create(model=EMBED_MODEL, input=textos)
+    return [np.asarray(d.embedding, dtype=np.float32) for d in sorted(resp.data, key=lambda d: d.index)]
+
+_batcher = EmbedBatcher(EMBED_BATCH_MAX, EMBED_BATCH_WAIT_MS) if EMBED_BATCH_MAX > 1 else None
+
+def _sha(text: str) -> bytes:
+    return hashlib.sha256(f"{EMBED_MODEL}\0{text}".encode("utf-8")).digest()
+
+@lru_cache(maxsize=4096)
+def embed(text: str) -> np.ndarray:
+    """Embedding float32 do texto; consulta o SQLite antes de chamar a OpenAI."""
+    h = _sha(text)
+    with _lock:
+        row = _conn.execute("SELECT vec FROM e WHERE sha=?", (h,)).fetchone()
+    if row:
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    vec = _batcher.embed(text) if _batcher is not None else _embed_api([text])[0]
+    vec.setflags(write=False)  # compartilhado via lru_cache
+
+    with _lock:
+        _conn.execute("INSERT OR REPLACE INTO e (sha, vec) VALUES (?, ?)", (h, vec.tobytes()))
+        _conn.commit()
+    return vec
@@ -1,10 +1,36 @@
 # llm_client.py
 # -*- coding: utf-8 -*-
 
+from __future__ import annotations
 import os
-from typing import Any, Dict, List
+import re
+import sys
+import time
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+import httpx
+import numpy as np
 from openai import OpenAI
 
+from topk_client import _is_id_like
+
+if TYPE_CHECKING:
+    from topk_client import Trecho
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+except Exception:
+    import json
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
 # =========================
 # OPENAI
 # =========================
@@ -12,11 +38,202 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY não definido.")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Pool HTTP único e persistente (keep-alive + HTTP/2) para todas as chamadas
+_http = httpx.Client(
+    http2=True,
+    limits=httpx.Limits(
+        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE", "50")),
+    ),
+    timeout=float(os.getenv("OPENAI_TIMEOUT", "30")),
+)
+
+client = OpenAI(api_key=OPENAI_API_KEY, http_client=_http)
 
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
 OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.2"))
 OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "1536"))
+# teto de saída para perguntas curtas e factuais (número, data, artigo)
+OPENAI_SHORT_MAX_TOKENS = int(os.getenv("OPENAI_SHORT_MAX_TOKENS", "384"))
+PERGUNTA_CURTA_CHARS = 60
+
+# modelo rápido para consultas curtas/factuais (vazio = desliga o roteamento)
+OPENAI_FAST_MODEL = os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini")
+OPENAI_FAST_MAX_TOKENS = int(os.getenv("OPENAI_FAST_MAX_TOKENS", "512"))
+# janela de contexto por família de modelo (prefixos específicos antes dos genéricos)
+_JANELAS = (
+    ("gpt-4.1", 1_047_576),
+    ("gpt-5", 400_000),
+    ("o1", 200_000), ("o3", 200_000), ("o4", 200_000),
+    ("gpt-4o", 128_000), ("gpt-4-turbo", 128_000),
+    ("gpt-4", 8_192),
+    ("gpt-3.5", 16_385),
+)
+
+def _janela(model: str) -> int:
+    for prefixo, n in _JANELAS:
+        if model.startswith(prefixo):
+            return n
+    return 128_000  # modelo desconhecido: janela dos modelos atuais menores
+
+# orçamento de tokens de entrada (system + documentos + pergunta). As mensagens são montadas
+# antes do roteamento, então o padrão cabe no menor dos dois modelos, descontada a saída.
+OPENAI_CONTEXT_TOKENS = int(
+    os.getenv("OPENAI_CONTEXT_TOKENS")
+    or min(_janela(m) for m in (OPENAI_MODEL, OPENAI_FAST_MODEL) if m) - OPENAI_MAX_TOKENS
+)
+
+# =========================
+# TOKENS
+# =========================
+try:
+    import tiktoken
+    try:
+        _enc = tiktoken.encoding_for_model(OPENAI_MODEL)
+    except KeyError:
+        _enc = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _enc = None
+
+@lru_cache(maxsize=8192)
+def _n_tokens(texto: str) -> int:
+    if _enc is None:
+        return len(texto) // 4 + 1  # estimativa grosseira sem tiktoken
+    return len(_enc.encode(texto))
+
+def _n_tokens_lote(textos: List[str]) -> List[int]:
+    # uma chamada encode_batch (Rust, multi-thread) em vez de N encode()
+    if _enc is None or len(textos) < 2:
+        return [_n_tokens(t) for t in textos]
+    return [len(ids) for ids in _enc.encode_batch(textos)]
+
+# =========================
+# CACHE DE RESPOSTAS (match exato)
+# =========================
+RESP_CACHE_SIZE = int(os.getenv("OPENAI_CACHE_SIZE", "4096"))
+RESP_CACHE_TTL = int(os.getenv("OPENAI_CACHE_TTL", "3600"))  # segundos
+# acima disso a resposta varia demais para reaproveitar
+RESP_CACHE_MAX_TEMPERATURE = 0.5
+
+# camada opcional em disco: sobrevive a restart/deploy e é compartilhada entre workers
+RESP_CACHE_DIR = os.getenv("OPENAI_CACHE_DIR")
+
+try:
+    import diskcache
+except Exception:
+    diskcache = None
+
+_resp_cache: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()
+_resp_cache_lock = threading.Lock()
+_resp_disk = None
+if diskcache is not None and RESP_CACHE_DIR:
+    try:
+        _resp_disk = diskcache.Cache(RESP_CACHE_DIR)
+    except Exception as e:
+        print(f"[ERRO cache em disco] {e}")
+
+def _cache_enabled() -> bool:
+    return RESP_CACHE_SIZE > 0 and OPENAI_TEMPERATURE <= RESP_CACHE_MAX_TEMPERATURE
+
+def _cache_key(messages: List[Dict[str, str]], model: str, max_tokens: int, doc_ids: frozenset) -> bytes:
+    canon = _dumps([
+        model, OPENAI_TEMPERATURE, max_tokens, sorted(doc_ids),
+        [(m["role"], m["content"]) for m in messages],
+    ])
+    return hashlib.blake2b(canon, digest_size=16).digest()
+
+def _cache_get(key: bytes) -> Optional[str]:
+    with _resp_cache_lock:
+        hit = _resp_cache.get(key)
+        if hit is not None:
+            ts, resposta = hit
+            if time.time() - ts <= RESP_CACHE_TTL:
+                _resp_cache.move_to_end(key)
+                return resposta
+            del _resp_cache[key]
+
+    if _resp_disk is None:
+        return None
+    try:
+        resposta = _resp_disk.get(key)  # expiração controlada pelo próprio diskcache
+    except Exception as e:
+        print(f"[ERRO cache em disco] {e}")
+        return None
+    if resposta is not None:
+        _cache_put(key, resposta, disco=False)  # promove para a memória
+    return resposta
+
+def _cache_put(key: bytes, resposta: str, disco: bool = True) -> None:
+    with _resp_cache_lock:
+        _resp_cache[key] = (time.time(), resposta)
+        _resp_cache.move_to_end(key)
+        while len(_resp_cache) > RESP_CACHE_SIZE:
+            _resp_cache.popitem(last=False)
+
+    if disco and _resp_disk is not None:
+        try:
+            _resp_disk.set(key, resposta, expire=RESP_CACHE_TTL)
+        except Exception as e:
+            print(f"[ERRO cache em disco] {e}")
+
+# =========================
+# CACHE SEMÂNTICO (pergunta parecida + mesmos documentos)
+# =========================
+SEM_CACHE_ENABLED = os.getenv("SEM_CACHE_ENABLED", "0") == "1"
+SEM_CACHE_SIZE = int(os.getenv("SEM_CACHE_SIZE", "1024"))
+SEM_CACHE_THRESHOLD = float(os.getenv("SEM_CACHE_THRESHOLD", "0.93"))
+# documentos da resposta guardada x atuais (Jaccard): com até 8 coleções x 5 trechos,
+# "alguma interseção" quase sempre acontece entre perguntas diferentes
+SEM_CACHE_MIN_JACCARD = float(os.getenv("SEM_CACHE_MIN_JACCARD", "0.9"))
+
+class _SemCache:
+    """Matriz de embeddings normalizados + respostas; similaridade por produto interno."""
+
+    def __init__(self, maxsize: int, threshold: float, min_jaccard: float) -> None:
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.min_jaccard = min_jaccard
+        self._mat: Optional[np.ndarray] = None
+        self._docs: List[frozenset] = []
+        self._answers: List[str] = []
+        self._used: List[float] = []
+        self._lock = threading.Lock()
+
+    def get(self, q: np.ndarray, doc_ids: frozenset) -> Optional[str]:
+        with self._lock:
+            if self._mat is None or not self._answers:
+                return None
+            scores = self._mat @ q
+            for i in np.argsort(scores)[::-1]:
+                if scores[i] < self.threshold:
+                    break
+                docs = self._docs[i]
+                if len(docs & doc_ids) >= self.min_jaccard * len(docs | doc_ids):
+                    self._used[i] = time.time()
+                    return self._answers[i]
+            return None
+
+    def put(self, q: np.ndarray, doc_ids: frozenset, resposta: str) -> None:
+        with self._lock:
+            if self._mat is None:
+                self._mat = q[np.newaxis, :]
+            else:
+                if len(self._answers) >= self.maxsize:
+                    lru = int(np.argmin(self._used))
+                    self._mat = np.delete(self._mat, lru, axis=0)
+                    del self._docs[lru], self._answers[lru], self._used[lru]
+                self._mat = np.vstack([self._mat, q])
+            self._docs.append(doc_ids)
+            self._answers.append(resposta)
+            self._used.append(time.time())
+
+_sem_cache = _SemCache(SEM_CACHE_SIZE, SEM_CACHE_THRESHOLD, SEM_CACHE_MIN_JACCARD)
+
+def _embed_pergunta(pergunta: str) -> np.ndarray:
+    from embed_cache import embed  # import tardio: embed_cache usa o client deste módulo
+    v = embed(pergunta)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
 
 # =========================
 # ORDENADOR HIERÁRQUICO
@@ -33,17 +250,40 @@ ORDEM_DOCUMENTOS = [
 ]
 
 # =========================
-# FORMATADORES
+# PROMPT
 # =========================
-def _fmt_doc(t: Dict[str, Any]) -> str:
-    numero = t.get("numero_portaria") or "s/n"
-    ano = t.get("ano") or ""
-    artigo = t.get("artigo_numero") or "-"
-    trecho = (t.get("trecho") or "").strip()
+SYSTEM_PROMPT = (
+    "Você é um assistente jurídico da PMPR que responde de forma objetiva, confiável e didática.\n"
+    "Sempre baseie sua resposta APENAS nos TRECHOS RECUPERADOS. Se faltar base, diga exatamente o que falta.\n"
+    "Quando a pergunta envolver normas, CITE explicitamente o Documento e o Artigo usados.\n"
+     "• Se o número do Documento não aparecer no texto do trecho, use os METADADOS fornecidos (portaria/ano/artigo).\n"
+    "  predominante(s) nos trechos e, se possível, indique os artigos onde o tema aparece.\n"
+    "Formato de citação sugerido: 'Fonte: Nome do Documento nº Numero do documento/Ano — art. '.\n"
+    "Responda em português do Brasil; em respostas longas, finalize com um resumo de 1–2 linhas."
+)
 
-    # 🔹 Tipo do documento vem da coleção
-    tipo = t.get("fonte_colecao") or "Documento"
+# regras fixas: uma mensagem pronta (o SDK não altera os dicts de messages);
+# os trechos vão numa segunda mensagem system, mantendo o mesmo prefixo
+_SYS_MSG: Dict[str, str] = {"role": "system", "content": SYSTEM_PROMPT}
+_DOCS_TEMPLATE = "TRECHOS RECUPERADOS:\n{}"
+_SYSTEM_PROMPT_TOKENS = _n_tokens(SYSTEM_PROMPT) + _n_tokens(_DOCS_TEMPLATE.format(""))
+
+# =========================
+# FORMATADORES
+# =========================
+def _fmt_doc(t: Trecho) -> str:
+    # 🔹 Tipo do documento vem da coleção; campos já normalizados no topk_client
+    return _render_doc(
+        t.fonte_colecao or "Documento",
+        t.numero_portaria or "s/n",
+        t.ano,
+        t.artigo_numero,
+        t.trecho,
+    )
 
+@lru_cache(maxsize=8192)
+def _render_doc(tipo: str, numero: str, ano: str, artigo: str, trecho: str) -> str:
+    # trechos se repetem entre turnos da conversa: cacheia a linha já formatada
     # 🔹 Identificação institucional limpa
     if numero != "s/n" and ano:
         identificacao = f"{tipo} nº {numero}/{ano}"
@@ -58,57 +298,242 @@ def _fmt_doc(t: Dict[str, Any]) -> str:
         f"  → {trecho}"
     )
 
-def _montar_bloco_documentos(resultados: Dict[str, List[Dict[str, Any]]]) -> str:
-    blocos = []
+_TRUNCADOS = "\n...(trechos truncados pelo limite de contexto)..."
+# abaixo disso não vale mandar o pedaço de um trecho cortado
+_MIN_CORTE = 64
 
+def _cortar(linha: str, n: int) -> str:
+    """Primeiros ~n tokens da linha (margem para a recontagem), ou "" se não couber nada útil."""
+    if n < _MIN_CORTE:
+        return ""
+    if _enc is None:
+        return linha[: (n - 8) * 4] + "…"
+    return _enc.decode(_enc.encode(linha)[: n - 8]) + "…"
+
+def _montar_bloco_documentos(
+    resultados: Dict[str, List[Trecho]],
+    budget: int,
+) -> Tuple[str, frozenset]:
+    """
+    Descarta trechos repetidos, conta os tokens de todas as linhas num lote só e
+    monta o bloco na ordem hierárquica dentro do orçamento, coletando os doc_ids citados.
+    """
+    # 1ª passada: descarta repetidos e formata as linhas na ordem hierárquica
+    plano: List[Tuple[str, List[Tuple[str, str]]]] = []
+    seen = set()
     for colecao in ORDEM_DOCUMENTOS:
         docs = resultados.get(colecao)
         if not docs:
             continue
-
-        linhas = [f"[{colecao.upper()}]"]
+        linhas = []
         for d in docs:
-            linhas.append(_fmt_doc(d))
+            key = (d.doc_id, d.artigo_numero, hash(d.trecho[:256]))
+            if key in seen:
+                continue
+            seen.add(key)
+            linhas.append((d.doc_id, _fmt_doc(d)))
+        if linhas:
+            plano.append((f"[{colecao.upper()}]", linhas))
 
-        blocos.append("\n".join(linhas))
+    # tokens de todos os headers/linhas numa chamada só
+    textos = [t for header, linhas in plano for t in (header, *(l for _, l in linhas))]
+    contagem = iter(_n_tokens_lote(textos))
+    custos = [(next(contagem), [next(contagem) for _ in linhas]) for _, linhas in plano]
 
-    return "\n\n".join(blocos)
+    # 2ª passada: decide o que entra. Linhas inteiras primeiro, na ordem hierárquica; a que
+    # não cabe é pulada (não derruba as seguintes) e depois entra cortada no que sobrar
+    livre = budget - _n_tokens(_TRUNCADOS)  # reserva espaço para o aviso de corte
+    if livre <= 0:
+        # nem uma linha cabe; o aviso sozinho só vai se couber no orçamento
+        aviso = _TRUNCADOS.lstrip("\n")
+        return (aviso if plano and _n_tokens(aviso) <= budget else ""), frozenset()
+    escolha: Dict[Tuple[int, int], str] = {}
+    grupos = set()
+    pulados: List[Tuple[int, int]] = []
+    for g, ((_, linhas), (custo_header, ns)) in enumerate(zip(plano, custos)):
+        for i, ((_, linha), n) in enumerate(zip(linhas, ns)):
+            custo = n + (0 if g in grupos else custo_header)
+            if custo <= livre:
+                escolha[g, i] = linha
+                grupos.add(g)
+                livre -= custo
+            else:
+                pulados.append((g, i))
+
+    for g, i in pulados:
+        header = 0 if g in grupos else custos[g][0]
+        linha = _cortar(plano[g][1][i][1], livre - header)
+        if linha:
+            escolha[g, i] = linha
+            grupos.add(g)
+            livre = 0  # o pedaço ocupa todo o restante
+
+    # 3ª passada: monta na ordem hierárquica, coletando os doc_ids enviados
+    partes: List[str] = []  # pedaços já com separadores; um único join no fim
+    doc_ids = set()
+    for g, (header, linhas) in enumerate(plano):
+        if g not in grupos:
+            continue
+        partes.append("\n\n" + header if partes else header)
+        for i, (doc_id, _) in enumerate(linhas):
+            linha = escolha.get((g, i))
+            if linha is not None:
+                partes.append("\n" + linha)
+                doc_ids.add(doc_id)
+
+    if pulados:
+        partes.append(_TRUNCADOS if partes else _TRUNCADOS.lstrip("\n"))
+
+    return "".join(partes), frozenset(doc_ids)
 
 # =========================
 # BUILD MESSAGES
 # =========================
-def _build_messages(pergunta: str, resultados: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, str]]:
-    documentos = _montar_bloco_documentos(resultados)
-
-    system_prompt = (
-        "Você é um assistente jurídico da PMPR que responde de forma objetiva, confiável e didática.\n"
-        "Sempre baseie sua resposta APENAS nos TRECHOS RECUPERADOS. Se faltar base, diga exatamente o que falta.\n"
-        "Quando a pergunta envolver normas, CITE explicitamente o Documento e o Artigo usados.\n"
-         "• Se o número do Documento não aparecer no texto do trecho, use os METADADOS fornecidos (portaria/ano/artigo).\n"
-        "  predominante(s) nos trechos e, se possível, indique os artigos onde o tema aparece.\n"
-        "Formato de citação sugerido: 'Fonte: Nome do Documento nº Numero do documento/Ano — art. '.\n"
-        "Responda em português do Brasil; em respostas longas, finalize com um resumo de 1–2 linhas."
-        f"{documentos}"
-    )
+_AST = sys.intern("assistant")
+_USR = sys.intern("user")
+
+def _build_messages(
+    pergunta: str,
+    resultados: Dict[str, List[Trecho]],
+    memoria: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[List[Dict[str, str]], frozenset]:
+    """Mensagens para a OpenAI + doc_ids efetivamente enviados no contexto."""
+    pergunta = pergunta.strip()
 
-    return [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": pergunta.strip()},
+    # trocas da conversa, já limitadas pela Memory (papéis fora do esperado viram "user")
+    historico = [
+        {"role": _AST if m.get("role") == _AST else _USR, "content": c}
+        for m in memoria or ()
+        if (c := str(m.get("content") or "").strip())
     ]
 
+    budget = OPENAI_CONTEXT_TOKENS - _SYSTEM_PROMPT_TOKENS - _n_tokens(pergunta)
+    budget -= sum(_n_tokens(h["content"]) for h in historico)
+    documentos, doc_ids = _montar_bloco_documentos(resultados, budget)
+
+    msgs = [_SYS_MSG, {"role": "system", "content": _DOCS_TEMPLATE.format(documentos)}]
+    msgs += historico
+    msgs.append({"role": "user", "content": pergunta})
+    return msgs, doc_ids
+
+# =========================
+# ROTEAMENTO DE MODELO
+# =========================
+# pedidos de síntese/comparação ficam sempre no modelo principal
+_RE_SINTESE = re.compile(
+    r"\b(compar\w*|diferen\w*|explique|explica\w*|resum\w*|analis\w*|por\s*que|quais)\b",
+    re.IGNORECASE,
+)
+
+def _pick_model(pergunta: str, resultados: Dict[str, List[Trecho]]) -> Tuple[str, int]:
+    """
+    (modelo, max_tokens): consultas curtas com pouca base vão para o modelo rápido,
+    e perguntas curtas sem pedido de síntese recebem um teto de saída menor.
+    """
+    p = pergunta.strip()
+    sintese = _RE_SINTESE.search(p) is not None
+
+    max_tokens = OPENAI_MAX_TOKENS
+    if len(p) < PERGUNTA_CURTA_CHARS and not sintese:
+        max_tokens = min(OPENAI_SHORT_MAX_TOKENS, OPENAI_MAX_TOKENS)
+
+    if OPENAI_FAST_MODEL:
+        n_trechos = sum(len(docs or []) for docs in resultados.values())
+        if len(p) < 80 and n_trechos <= 2 and not sintese:
+            return OPENAI_FAST_MODEL, min(OPENAI_FAST_MAX_TOKENS, max_tokens)
+    return OPENAI_MODEL, max_tokens
+
 # =========================
 # API PÚBLICA
 # =========================
-def gerar_resposta(pergunta: str, resultados: Dict[str, List[Dict[str, Any]]]) -> str:
+# resposta direta quando a busca não trouxe texto: não vale uma ida à OpenAI
+RESPOSTA_SEM_BASE = (
+    "Não encontrei trechos relevantes nas normas consultadas sobre essa pergunta. "
+    "Tente reformular com termos mais específicos (ex.: número da portaria ou artigo)."
+)
+
+_stats: Counter = Counter()
+_stats_lock = threading.Lock()
+
+def _contar(evento: str) -> None:
+    with _stats_lock:
+        _stats[evento] += 1
+
+def llm_status() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+def gerar_resposta_stream(
+    pergunta: str,
+    resultados: Dict[str, List[Trecho]],
+    memoria: Optional[List[Dict[str, Any]]] = None,
+) -> Iterator[str]:
+    """Gera a resposta em partes, à medida que os tokens chegam da OpenAI."""
+    if not any(t.trecho for docs in resultados.values() for t in docs or ()):
+        _contar("sem_trechos")
+        yield RESPOSTA_SEM_BASE
+        return
+
+    messages, doc_ids = _build_messages(pergunta, resultados, memoria)
+    if not doc_ids:
+        # nenhum trecho coube no orçamento: sem fontes, não chama o modelo
+        _contar("sem_trechos")
+        yield RESPOSTA_SEM_BASE
+        return
+    model, max_tokens = _pick_model(pergunta, resultados)
+
+    key = _cache_key(messages, model, max_tokens, doc_ids) if _cache_enabled() else None
+    if key is not None:
+        cached = _cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    # cache semântico só sem histórico (continuação depende do contexto) e sem número:
+    # "prazo da portaria 277" e "... 278" têm embeddings quase iguais
+    q_vec = None
+    if SEM_CACHE_ENABLED and not memoria and doc_ids and not _is_id_like(pergunta):
+        try:
+            q_vec = _embed_pergunta(pergunta.strip())
+        except Exception as e:
+            print(f"[ERRO cache semantico] {e}")
+        if q_vec is not None:
+            cached = _sem_cache.get(q_vec, doc_ids)
+            if cached is not None:
+                if key is not None:
+                    _cache_put(key, cached)
+                yield cached
+                return
+
+    resp = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=OPENAI_TEMPERATURE,
+        max_tokens=max_tokens,
+        stream=True,
+    )
+    partes = []
+    for chunk in resp:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            partes.append(delta)
+            yield delta
+
+    resposta = "".join(partes).strip()
+    if key is not None and resposta:
+        _cache_put(key, resposta)
+    if q_vec is not None and resposta:
+        _sem_cache.put(q_vec, doc_ids, resposta)
+
+def gerar_resposta(
+    pergunta: str,
+    resultados: Dict[str, List[Trecho]],
+    memoria: Optional[List[Dict[str, Any]]] = None,
+) -> str:
     try:
-        messages = _build_messages(pergunta, resultados)
-        resp = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=messages,
-            temperature=OPENAI_TEMPERATURE,
-            max_tokens=OPENAI_MAX_TOKENS,
-        )
-        return resp.choices[0].message.content.strip()
+        return "".join(gerar_resposta_stream(pergunta, resultados, memoria)).strip()
     except Exception as e:
         print(f"[ERRO gerar_resposta] {e}")
         return "Erro ao gerar resposta."
@@ -1,10 +1,17 @@
 # memory.py
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-from collections import defaultdict, deque
-from typing import Deque, Dict, List, Literal, TypedDict
+from typing import Dict, List, Literal, Optional, TypedDict
+import itertools
+import os
+import tempfile
 import threading
 
+try:
+    import msgpack
+except Exception:
+    msgpack = None
+
 Role = Literal["user", "assistant"]
 
 class Msg(TypedDict):
@@ -12,10 +19,29 @@ class Msg(TypedDict):
     content: str
 
 class Memory:
-    def __init__(self, max_msgs: int = 6) -> None:
+    """Memória curta por usuário, em processo. Com path=..., restaura e grava snapshots msgpack
+    (só quem instanciar assim; o bot hoje não usa memória de conversa)."""
+
+    def __init__(self, max_msgs: int = 6, path: Optional[str] = None, snapshot_every: int = 20) -> None:
         self.max_msgs = max_msgs
-        self._data: Dict[str, Deque[Msg]] = defaultdict(lambda: deque(maxlen=self.max_msgs))
+        # lista simples (não deque): já serializável, cortada para max_msgs a cada append
+        self._data: Dict[str, List[Msg]] = {}
+        # global: só estrutura do dict (novo usuário, clear, snapshot); shards: lista de cada usuário
         self._lock = threading.Lock()
+        self._locks = [threading.Lock() for _ in range(32)]
+        # persistência opcional (msgpack em disco a cada N escritas)
+        self.path = path
+        self.snapshot_every = max(1, snapshot_every)
+        self._writes = itertools.count(1)  # next() é atômico no CPython
+        self._save_lock = threading.Lock()
+        if path and os.path.exists(path):
+            # snapshot corrompido/truncado não pode derrubar o import do bot
+            try:
+                with open(path, "rb") as f:
+                    self.restore(f.read())
+            except Exception as e:
+                print(f"[ERRO memoria snapshot] restore falhou, memória vazia: {e}")
+                self._data.clear()
 
     def add_user_msg(self, user: str, msg: str) -> None:
         self._append(user, "user", msg)
@@ -23,19 +49,65 @@ class Memory:
     def add_assistant_msg(self, user: str, msg: str) -> None:
         self._append(user, "assistant", msg)
 
+    def add_exchange(self, user: str, pergunta: str, resposta: str) -> None:
+        # mesma interface da RedisMemory (lá vira um pipeline só)
+        self._append(user, "user", pergunta)
+        self._append(user, "assistant", resposta)
+
     # aliases legado
     def add_msg(self, user: str, msg: str) -> None: self.add_user_msg(user, msg)
     def add(self, user: str, msg: str) -> None: self.add_user_msg(user, msg)
 
+    def _lk(self, user: str) -> threading.Lock:
+        return self._locks[hash(user) & 31]
+
     def get_context(self, user: str) -> List[Msg]:
-        with self._lock:
-            if user not in self._data:
-                return []
-            return list(self._data[user])
+        buf = self._data.get(user)
+        if buf is None:
+            return []
+        with self._lk(user):
+            return buf[:]
+
+    def get_contexts(self, users: List[str]) -> Dict[str, List[Msg]]:
+        # mesma interface da RedisMemory (lá vira um pipeline só)
+        return {u: self.get_context(u) for u in users}
 
     def get(self, user: str) -> List[Msg]:
         return self.get_context(user)
 
+    def snapshot(self) -> bytes:
+        if msgpack is None:
+            raise RuntimeError("msgpack não instalado.")
+        with self._lock:
+            itens = list(self._data.items())
+        data = {}
+        for u, buf in itens:
+            with self._lk(u):
+                data[u] = buf[:]
+        return msgpack.packb(data, use_bin_type=True)
+
+    def restore(self, blob: bytes) -> None:
+        if msgpack is None:
+            raise RuntimeError("msgpack não instalado.")
+        data = msgpack.unpackb(blob, raw=False)
+        with self._lock:
+            self._data.clear()
+            for user, msgs in data.items():
+                self._data[user] = list(msgs[-self.max_msgs:]) if self.max_msgs > 0 else []
+
+    def _save(self) -> None:
+        blob = self.snapshot()
+        with self._save_lock:
+            # temporário único por processo (vários workers gravam o mesmo snapshot)
+            fd, tmp = tempfile.mkstemp(prefix=".memory-", dir=os.path.dirname(os.path.abspath(self.path)))
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(blob)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
     def clear(self, user: str | None = None) -> None:
         with self._lock:
             if user is None:
@@ -49,5 +121,19 @@ class Memory:
         text = "" if msg is None else str(msg).strip()
         if not text:
             return
-        with self._lock:
-            self._data[user].append({"role": role, "content": text})
+        buf = self._data.get(user)
+        if buf is None:
+            # 1º contato do usuário: lista criada direto, sem __missing__/lambda
+            with self._lock:
+                buf = self._data.setdefault(user, [])
+        with self._lk(user):
+            buf.append({"role": role, "content": text})
+            excesso = len(buf) - self.max_msgs
+            if excesso > 0:
+                del buf[:excesso]  # mantém só as N mais recentes
+        salvar = bool(self.path) and next(self._writes) % self.snapshot_every == 0
+        if salvar:
+            try:
+                self._save()
+            except Exception as e:
+                print(f"[ERRO memoria snapshot] {e}")
@@ -1,7 +1,7 @@
 # memory_redis.py
 # -*- coding: utf-8 -*-
-import os, json
-from typing import List, Literal, TypedDict
+import os, queue, atexit, threading
+from typing import Dict, List, Literal, Tuple, TypedDict
 import redis
 
 Role = Literal["user", "assistant"]
@@ -12,27 +12,117 @@ class Msg(TypedDict):
 MAX_MSGS = int(os.getenv("MEMORY_MAX_MSGS", "6"))
 TTL_SECONDS = int(os.getenv("MEMORY_TTL_SECONDS", "604800"))  # 7 dias
 
+# papel gravado no stream como 1 caractere; na leitura volta para as strings
+# únicas abaixo (todas as mensagens compartilham o mesmo objeto)
+_ROLE_CODE = {"user": "u", "assistant": "a"}
+_ROLE_NAME = {"u": "user", "a": "assistant", "user": "user", "assistant": "assistant"}
+
+# pool limitado: sob pico as threads esperam conexão livre (até o timeout)
+# em vez de abrir sockets sem limite
+REDIS_POOL_SIZE = int(os.getenv("REDIS_POOL_SIZE", "32"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+
 def _client():
     url = os.getenv("REDIS_URL")
     if url:
         # aceita redis:// ou rediss://
-        return redis.Redis.from_url(url, decode_responses=True)
-    return redis.Redis(
-        host=os.getenv("REDIS_HOST", "localhost"),
-        port=int(os.getenv("REDIS_PORT", "6379")),
-        password=os.getenv("REDIS_PASSWORD"),
-        ssl=os.getenv("REDIS_SSL", "0") == "1",
-        decode_responses=True,
-    )
+        pool = redis.BlockingConnectionPool.from_url(
+            url,
+            max_connections=REDIS_POOL_SIZE,
+            timeout=REDIS_POOL_TIMEOUT,
+            decode_responses=True,
+        )
+    else:
+        ssl = os.getenv("REDIS_SSL", "0") == "1"
+        pool = redis.BlockingConnectionPool(
+            max_connections=REDIS_POOL_SIZE,
+            timeout=REDIS_POOL_TIMEOUT,
+            connection_class=redis.SSLConnection if ssl else redis.Connection,
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", "6379")),
+            password=os.getenv("REDIS_PASSWORD"),
+            decode_responses=True,
+        )
+    return redis.Redis(connection_pool=pool)
 
 r = _client()
 
+# stream limitado (XADD MAXLEN) por usuário: campos r/c direto, sem JSON.
+# XADD(s) + EXPIRE no servidor: atômico, um comando só (EVALSHA em cache)
+# ARGV = role1, content1, role2, content2, ..., max_msgs, ttl
+_APPEND_LUA = """
+local n = #ARGV - 2
+local maxlen = ARGV[n + 1]
+for i = 1, n, 2 do
+  redis.call('XADD', KEYS[1], 'MAXLEN', maxlen, '*', 'r', ARGV[i], 'c', ARGV[i + 1])
+end
+local ttl = tonumber(ARGV[n + 2])
+if ttl > 0 then redis.call('EXPIRE', KEYS[1], ttl) end
+"""
+_append_script = r.register_script(_APPEND_LUA)
+
+# gravação em segundo plano (opcional): o append só enfileira e a thread junta
+# o que chegou num pipeline. Troca leitura-da-própria-escrita imediata por
+# não esperar o Redis no caminho da resposta.
+MEMORY_ASYNC_WRITES = os.getenv("MEMORY_ASYNC_WRITES", "0") == "1"
+MEMORY_WRITE_BATCH = int(os.getenv("MEMORY_WRITE_BATCH", "64"))
+
+class _EscritorAssincrono:
+    """Fila + thread daemon: appends de várias threads viram um único pipeline."""
+
+    def __init__(self, max_batch: int) -> None:
+        self.max_batch = max(1, max_batch)
+        self._q: "queue.SimpleQueue[Tuple[str, list]]" = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self._loop, name="redis-memory-writer", daemon=True)
+        self._worker.start()
+        atexit.register(self.flush)
+
+    def put(self, key: str, args: list) -> None:
+        self._q.put((key, args))
+
+    def _drenar(self, items: List[Tuple[str, list]]) -> List[Tuple[str, list]]:
+        while len(items) < self.max_batch:
+            try:
+                items.append(self._q.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _gravar(self, items: List[Tuple[str, list]]) -> None:
+        p = r.pipeline(transaction=False)
+        for key, args in items:
+            _append_script(keys=[key], args=args, client=p)
+        p.execute()
+
+    def _loop(self) -> None:
+        while True:
+            items = self._drenar([self._q.get()])
+            try:
+                self._gravar(items)
+            except Exception as e:
+                print(f"[ERRO memoria redis] {e}")
+
+    def flush(self) -> None:
+        """Grava o que ainda estiver na fila (chamado no atexit)."""
+        while True:
+            items = self._drenar([])
+            if not items:
+                return
+            try:
+                self._gravar(items)
+            except Exception as e:
+                print(f"[ERRO memoria redis] {e}")
+                return
+
+_escritor = _EscritorAssincrono(MEMORY_WRITE_BATCH) if MEMORY_ASYNC_WRITES else None
+
 class RedisMemory:
     def __init__(self, prefix: str = "mem"):
         self.prefix = prefix
 
     def _key(self, user: str) -> str:
-        return f"{self.prefix}:{user}"
+        # chave nova (tipo stream); as listas antigas em {prefix}:{user} expiram pelo TTL
+        return f"{self.prefix}:s:{user}"
 
     def add_user_msg(self, user: str, msg: str) -> None:
         self._append(user, {"role": "user", "content": (msg or "").strip()})
@@ -40,20 +130,43 @@ class RedisMemory:
     def add_assistant_msg(self, user: str, msg: str) -> None:
         self._append(user, {"role": "assistant", "content": (msg or "").strip()})
 
+    def add_exchange(self, user: str, pergunta: str, resposta: str) -> None:
+        """Pergunta + resposta numa única chamada ao Redis (um round-trip em vez de dois)."""
+        self._append_many(user, [
+            {"role": "user", "content": (pergunta or "").strip()},
+            {"role": "assistant", "content": (resposta or "").strip()},
+        ])
+
     def _append(self, user: str, m: Msg) -> None:
-        if not user or not m["content"]:
+        self._append_many(user, [m])
+
+    def _append_many(self, user: str, msgs: List[Msg]) -> None:
+        msgs = [m for m in msgs if m["content"]]
+        if not user or not msgs:
             return
-        key = self._key(user)
-        p = r.pipeline()
-        p.lpush(key, json.dumps(m, ensure_ascii=False))
-        p.ltrim(key, 0, MAX_MSGS - 1)  # mantém só as N mais recentes
-        if TTL_SECONDS > 0:
-            p.expire(key, TTL_SECONDS)
-        p.execute()
+        args: List[object] = []
+        for m in msgs:
+            args += (_ROLE_CODE.get(m["role"], "u"), m["content"])
+        args += (MAX_MSGS, TTL_SECONDS)
+        if _escritor is not None:
+            _escritor.put(self._key(user), args)
+        else:
+            _append_script(keys=[self._key(user)], args=args)
 
     def get_context(self, user: str) -> List[Msg]:
-        data = r.lrange(self._key(user), 0, MAX_MSGS - 1)  # mais novas primeiro
-        return [json.loads(x) for x in reversed(data)]     # devolve mais antigas primeiro
+        # MAXLEN exato (stream de poucas entradas): XRANGE já vem na ordem, mais antigas primeiro
+        data = r.xrange(self._key(user), count=MAX_MSGS)
+        return [{"role": _ROLE_NAME.get(f["r"], "user"), "content": f["c"]} for _, f in data]
+
+    def get_contexts(self, users: List[str]) -> Dict[str, List[Msg]]:
+        """Contexto de vários usuários num único round-trip (pipeline de XRANGE)."""
+        p = r.pipeline(transaction=False)
+        for u in users:
+            p.xrange(self._key(u), count=MAX_MSGS)
+        return {
+            u: [{"role": _ROLE_NAME.get(f["r"], "user"), "content": f["c"]} for _, f in data]
+            for u, data in zip(users, p.execute())
+        }
 
     # ---- aliases de compatibilidade ----
     def add_msg(self, user: str, msg: str) -> None: self.add_user_msg(user, msg)
@@ -67,7 +180,6 @@ class Dedup:
     def seen(self, msg_id: str) -> bool:
         if not msg_id: return False
         key = f"{self.prefix}:{msg_id}"
-        added = r.setnx(key, "1")  # True se não existia
-        if added and self.ttl > 0:
-            r.expire(key, self.ttl)
+        # SET NX EX: cria já com TTL num comando só (sem chave órfã sem expiração)
+        added = r.set(key, "1", nx=True, ex=self.ttl if self.ttl > 0 else None)  # True se não existia
         return not added  # True => já visto
@@ -1,6 +1,7 @@
 # synonyms.py
 import re
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
 SYNONYMS: Dict[str, List[str]] = {
     r"\bCPO\b": [
@@ -89,25 +90,67 @@ SYNONYMS: Dict[str, List[str]] = {
     ],
 }
 
+# todos os padrões numa alternação só (um grupo nomeado por padrão):
+# uma varredura da consulta em vez de um re.search por padrão.
+# O \b inicial comum fica fora da alternação: posições que não são início
+# de palavra falham sem testar nenhum ramo.
+_PATTERNS = tuple(SYNONYMS)
+if not all(pattern.startswith(r"\b") for pattern in _PATTERNS):
+    raise RuntimeError("SYNONYMS: todo padrão precisa começar com \\b.")
+_COMBINED = re.compile(
+    r"\b(?:"
+    + "|".join(f"(?P<g{i}>{pattern[2:]})" for i, pattern in enumerate(_PATTERNS))
+    + ")",
+    re.IGNORECASE,
+)
+# expansões de cada padrão (mesmo índice do grupo) como chaves de dedup
+# (minúsculas, sem espaços nas pontas) + termo já entre aspas por chave
+_EXPANSIONS = tuple(
+    tuple(t.lower().strip() for t in SYNONYMS[pattern])
+    for pattern in _PATTERNS
+)
+_QUOTED: Dict[str, str] = {}
+for _pattern in _PATTERNS:
+    for _t in SYNONYMS[_pattern]:
+        _QUOTED.setdefault(_t.lower().strip(), f"\"{_t}\"")
+
+# pré-filtro: de cada padrão, o maior trecho literal obrigatório (ASCII, casefold).
+# Se nenhum aparece na consulta, nenhum padrão casa e a regex nem roda.
+# Padrão sem literal garantido (alternação, grupo opcional...) desliga o pré-filtro.
+_RE_TOKENS = re.compile(r"\\[bBsSwWdD]|\[[^\]]*\]|\+")
+
+def _ancora(pattern: str) -> Optional[str]:
+    partes = _RE_TOKENS.split(pattern)
+    if any(re.search(r"[\\?*{}|()^$.]", t) for t in partes):
+        return None
+    literais = [t.casefold() for t in partes if t and t.isascii()]
+    return max(literais, key=len) if literais else None
+
+_ANCORAS: Optional[Tuple[str, ...]] = tuple(_ancora(p) for p in _PATTERNS)
+if any(a is None for a in _ANCORAS):
+    _ANCORAS = None
+
+# função pura: perguntas repetidas (siglas, temas comuns) saem do cache
+@lru_cache(maxsize=2048)
 def expand_query(query: str) -> str:
     if not query or not query.strip():
         return query
 
-    extras: List[str] = []
-
-    for pattern, expansions in SYNONYMS.items():
-        if re.search(pattern, query, flags=re.IGNORECASE):
-            extras.extend(expansions)
+    if _ANCORAS is not None:
+        # "ı" casa com "i" no IGNORECASE, mas casefold() não o converte
+        q_cf = query.casefold().replace("ı", "i")
+        for ancora in _ANCORAS:
+            if ancora in q_cf:
+                break
+        else:
+            return query
 
-    extras_unique = []
-    seen = set()
-    for t in extras:
-        key = t.lower().strip()
-        if key not in seen:
-            seen.add(key)
-            extras_unique.append(t)
+    # índices dos padrões encontrados; expande na ordem do dicionário, como antes
+    matched = {m.lastindex - 1 for m in _COMBINED.finditer(query)}
 
-    if not extras_unique:
+    # dict.fromkeys: dedup preservando a ordem, em C
+    chaves = dict.fromkeys(k for i in sorted(matched) for k in _EXPANSIONS[i])
+    if not chaves:
         return query
 
-    return query + " " + " ".join(f"\"{t}\"" for t in extras_unique)
+    return query + " " + " ".join(_QUOTED[k] for k in chaves)
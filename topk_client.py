@@ -10,8 +10,30 @@ Arquitetura:
 """
 
 from __future__ import annotations
-import os, re, unicodedata
-from typing import Any, Dict, List, Optional
+import os, re, time, threading, unicodedata
+from itertools import islice
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as _FutureTimeout
+from dataclasses import dataclass, field as _dc_field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson as _json
+    _JSONDecodeError = _json.JSONDecodeError
+except Exception:
+    import json as _json
+    _JSONDecodeError = ValueError
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+try:
+    import diskcache
+except Exception:
+    diskcache = None
 
 # ==========================================================
 # DEBUG
@@ -41,11 +63,32 @@ ART_FIELD      = os.getenv("TOPK_ART_FIELD", "artigo_numero")
 
 SEM_WEIGHT = float(os.getenv("TOPK_SEM_WEIGHT", "0.8"))
 LEX_WEIGHT = float(os.getenv("TOPK_LEX_WEIGHT", "0.2"))
+# consulta com número (portaria 277, art. 12): BM25 passa a dominar o ranking
+# na mesma consulta híbrida, em vez de uma consulta só-keyword antes
+LEX_WEIGHT_ID = float(os.getenv("TOPK_LEX_WEIGHT_ID", "1.0"))
 
 W_TEXT   = float(os.getenv("TOPK_W_TEXT", "0.4"))
 W_EMENTA = float(os.getenv("TOPK_W_EMENTA", "0.3"))
 W_TITULO = float(os.getenv("TOPK_W_TITULO", "0.3"))
 
+# cache de resultados por consulta: a mesma pergunta não repete o embedding
+# server-side (semantic_similarity) nem as RPCs. 0 desliga.
+TOPK_CACHE_SIZE = int(os.getenv("TOPK_CACHE_SIZE", "1024"))
+TOPK_CACHE_TTL  = float(os.getenv("TOPK_CACHE_TTL", "300"))
+# camada opcional em disco: compartilhada entre os workers do gunicorn e sobrevive a restart
+TOPK_CACHE_DIR  = os.getenv("TOPK_CACHE_DIR")
+
+# "portaria 277": consulta só a coleção do tipo citado; as demais só se ela vier vazia. 0 desliga.
+TOPK_TIPO_PRIMEIRO = os.getenv("TOPK_TIPO_PRIMEIRO", "1") == "1"
+
+# cache semântico: consulta parecida (cosseno >= limiar) reaproveita os trechos sem ir ao TopK.
+# custa um embedding por consulta nova; 0 desliga.
+TOPK_SEM_CACHE_SIZE = int(os.getenv("TOPK_SEM_CACHE_SIZE", "0"))
+TOPK_SEM_CACHE_THRESHOLD = float(os.getenv("TOPK_SEM_CACHE_THRESHOLD", "0.95"))
+
+# prazo total da busca (s): coleção que não respondeu a tempo fica de fora. 0 = sem prazo
+TOPK_QUERY_TIMEOUT = float(os.getenv("TOPK_QUERY_TIMEOUT", "8"))
+
 # ==========================================================
 # SDK
 # ==========================================================
@@ -60,11 +103,46 @@ except Exception:
 _client = None
 _collections: Dict[str, Any] = {}
 _init_error: Optional[str] = None
+# re-init concorrente (várias requisições com carga parcial) não duplica o Client
+_init_lock = threading.Lock()
+
+# fan-out das coleções em paralelo (latência ~ max das RPCs, não a soma)
+def _novo_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=max(1, len(TOPK_COLLECTIONS)), thread_name_prefix="topk")
+
+_pool = _novo_pool()
+_pool_lock = threading.Lock()
+# o SDK não tem timeout por RPC: consulta que estourou o prazo segue presa numa thread.
+# O pool é trocado para as próximas buscas não enfileirarem atrás dela; acima deste
+# limite de threads presas não se cria outro (evita acumular threads com o TopK fora do ar)
+TOPK_MAX_PRESAS = int(os.getenv("TOPK_MAX_PRESAS", str(4 * max(1, len(TOPK_COLLECTIONS)))))
+_presas = 0
+
+# ==========================================================
+# MODELO DE RESULTADO
+# ==========================================================
+@dataclass(slots=True, frozen=True)
+class Trecho:
+    """Resultado normalizado (uma vez) da busca; consumido por atributo no llm_client."""
+    doc_id: str
+    artigo_numero: str
+    titulo: str
+    trecho: str
+    score: Optional[float]
+    numero_portaria: str
+    ano: str
+    fonte_colecao: str
+    # registro bruto só com DEBUG=1: fora disso não segura o dict do TopK (nem no cache)
+    raw: Dict[str, Any] = _dc_field(default_factory=dict, repr=False, compare=False)
 
 # ==========================================================
 # INIT
 # ==========================================================
 def _init() -> None:
+    with _init_lock:
+        _init_locked()
+
+def _init_locked() -> None:
     global _client, _collections, _init_error
 
     if Client is None:
@@ -78,10 +156,13 @@ def _init() -> None:
         _init_error = "missing_env"
         return
 
-    _client = Client(api_key=api_key, region=region)
-    _collections = {}
+    # idempotente: reaproveita o client e só carrega as coleções que faltam
+    if _client is None:
+        _client = Client(api_key=api_key, region=region)
 
     for name in TOPK_COLLECTIONS:
+        if name in _collections:
+            continue
         try:
             _collections[name] = _client.collection(name)
             _dbg(f"Coleção carregada: {name}")
@@ -95,18 +176,38 @@ _init()
 # ==========================================================
 # UTILS
 # ==========================================================
+@lru_cache(maxsize=4096)
 def _ascii(q: str) -> str:
     return unicodedata.normalize("NFD", q).encode("ascii", "ignore").decode("ascii")
 
+# todos os caracteres das categorias Unicode Z* (Zs, Zl, Zp); estável há várias versões
+_RE_ZSPACE = re.compile("[\u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]")
+
+@lru_cache(maxsize=4096)
 def _norm_spaces(q: str) -> str:
-    return "".join(" " if unicodedata.category(c).startswith("Z") else c for c in q).strip()
+    # espaço Unicode -> " " (um por um, sem colapsar); em ASCII o único Z* já é " "
+    if q.isascii():
+        return q.strip()
+    return _RE_ZSPACE.sub(" ", q).strip()
+
+_RE_NUM = re.compile(r"\b(\d{2,6})\b")
+_RE_DIGIT = re.compile(r"\d")
 
 def _extract_number(q: str) -> Optional[str]:
-    m = re.search(r"\b(\d{2,6})\b", q)
+    m = _RE_NUM.search(q)
     return m.group(1) if m else None
 
 def _as_dict(rec: Any) -> Dict[str, Any]:
-    return rec if isinstance(rec, dict) else getattr(rec, "__dict__", {}) or {}
+    if isinstance(rec, dict):
+        return rec
+    if isinstance(rec, (str, bytes)):
+        # registro serializado (orjson aceita str ou bytes)
+        try:
+            data = _json.loads(rec)
+        except _JSONDecodeError:
+            return {}
+        return data if isinstance(data, dict) else {}
+    return getattr(rec, "__dict__", {}) or {}
 
 def _merge_excerto(item: Dict[str, Any]) -> str:
     return " ".join(
@@ -116,116 +217,349 @@ def _merge_excerto(item: Dict[str, Any]) -> str:
         ] if p
     )
 
-def _normalize_item(raw: Any) -> Dict[str, Any]:
+def _normalize_item(raw: Any, colecao: str) -> Trecho:
     item = _as_dict(raw)
-    return {
-        "doc_id": item.get("doc_id") or item.get("id") or "-",
-        "artigo_numero": item.get(ART_FIELD) or "-",
-        "titulo": item.get(TITULO_FIELD) or "-",
-        "trecho": _merge_excerto(item),
-        "score": item.get("score") or item.get("text_score") or item.get("sim"),
-        "numero_portaria": item.get(PORTARIA_FIELD) or "",
-        "ano": item.get(ANO_FIELD) or "",
-        "_raw": item,
-    }
+    return Trecho(
+        doc_id=str(item.get("doc_id") or item.get("id") or "-"),
+        artigo_numero=str(item.get(ART_FIELD) or "-"),
+        titulo=str(item.get(TITULO_FIELD) or "-").strip(),  # strip uma vez; _dedupe compara direto
+        trecho=_merge_excerto(item),
+        score=item.get("score") or item.get("text_score") or item.get("sim"),
+        numero_portaria=str(item.get(PORTARIA_FIELD) or ""),
+        ano=str(item.get(ANO_FIELD) or ""),
+        fonte_colecao=colecao,
+        raw=item if DEBUG else {},
+    )
 
-def _dedupe(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _dedupe(items: Iterable[Trecho]) -> Iterator[Trecho]:
+    # gerador: 1ª ocorrência de cada chave, e para assim que o consumidor tiver k
     seen = set()
-    out = []
     for it in items:
-        key = (it["doc_id"], it["artigo_numero"], it["titulo"])
+        key = (it.doc_id, it.artigo_numero, it.titulo)
         if key not in seen:
             seen.add(key)
-            out.append(it)
-    return out
+            yield it
 
+@lru_cache(maxsize=4096)
 def _is_id_like(q: str) -> bool:
-    ql = _ascii(q.lower())
-    return _extract_number(ql) is not None
+    # caminho comum: sem dígito nenhum, nada de lower()/normalize
+    if not _RE_DIGIT.search(q):
+        return False
+    # ASCII puro: lower()/_ascii não mudam dígitos nem fronteiras de palavra
+    if q.isascii():
+        return _RE_NUM.search(q) is not None
+    return _extract_number(_ascii(q.lower())) is not None
+
+# tipo de ato citado na pergunta (já em ASCII minúsculo) -> coleção
+_TIPO_MAP = {
+    "portaria": "Portaria",
+    "diretriz": "Diretriz",
+    "memorando": "Memorando",
+    "nota de instrucao": "Nota_de_Instrucao",
+    "orientacao": "Orientacoes",
+    "orientacoes": "Orientacoes",
+    "pap": "PAP",
+    "pop": "POP",
+    "resolucao": "Resolucao",
+}
+_RE_TIPO = re.compile(r"\b(" + "|".join(sorted(map(re.escape, _TIPO_MAP), key=len, reverse=True)) + r")\b")
+
+@lru_cache(maxsize=4096)
+def _tipo_ato(q: str) -> Optional[str]:
+    m = _RE_TIPO.search(_ascii(q.lower()))
+    return _TIPO_MAP[m.group(1)] if m else None
 
 # ==========================================================
 # QUERIES
 # ==========================================================
-def _keyword_query(col, q: str, k: int) -> List[Dict[str, Any]]:
-    try:
-        qb = col.query(
-            select(
-                "doc_id", TITULO_FIELD, ART_FIELD,
-                PORTARIA_FIELD, ANO_FIELD,
-                TEXT_FIELD, EMENTA_FIELD,
-                text_score=fn.bm25_score(),
-            ).filter(match(q) | match(_ascii(q)))
-             .topk(field("text_score"), k)
-        )
-        return [_normalize_item(r) for r in qb]
-    except Exception:
-        return []
+# As consultas não dependem da coleção: a expressão (select/filter/topk) é montada
+# uma vez por (consulta, k, peso) e reaproveitada por todas as coleções/threads.
+@lru_cache(maxsize=1024)
+def _semantic_expr(qn: str, k: int):
+    return select(
+        "doc_id", TITULO_FIELD, ART_FIELD,
+        PORTARIA_FIELD, ANO_FIELD,
+        TEXT_FIELD, EMENTA_FIELD,
+        sim_texto=fn.semantic_similarity(TEXT_FIELD, qn),
+        sim_ementa=fn.semantic_similarity(EMENTA_FIELD, qn),
+        sim_titulo=fn.semantic_similarity(TITULO_FIELD, qn),
+    ).topk(
+        W_TEXT * field("sim_texto") +
+        W_EMENTA * field("sim_ementa") +
+        W_TITULO * field("sim_titulo"),
+        k
+    )
 
-def _semantic_query(col, q: str, k: int) -> List[Dict[str, Any]]:
-    qn = _norm_spaces(q)
-    qb = col.query(
-        select(
-            "doc_id", TITULO_FIELD, ART_FIELD,
-            PORTARIA_FIELD, ANO_FIELD,
-            TEXT_FIELD, EMENTA_FIELD,
-            sim_texto=fn.semantic_similarity(TEXT_FIELD, qn),
-            sim_ementa=fn.semantic_similarity(EMENTA_FIELD, qn),
-            sim_titulo=fn.semantic_similarity(TITULO_FIELD, qn),
-        ).topk(
+@lru_cache(maxsize=1024)
+def _hybrid_expr(qn: str, qn_ascii: str, k: int, lex_weight: float):
+    return select(
+        "doc_id", TITULO_FIELD, ART_FIELD,
+        PORTARIA_FIELD, ANO_FIELD,
+        TEXT_FIELD, EMENTA_FIELD,
+        sim_texto=fn.semantic_similarity(TEXT_FIELD, qn),
+        sim_ementa=fn.semantic_similarity(EMENTA_FIELD, qn),
+        sim_titulo=fn.semantic_similarity(TITULO_FIELD, qn),
+        text_score=fn.bm25_score(),
+    ).filter(match(qn) | match(qn_ascii)).topk(
+        SEM_WEIGHT * (
             W_TEXT * field("sim_texto") +
             W_EMENTA * field("sim_ementa") +
-            W_TITULO * field("sim_titulo"),
-            k
-        )
+            W_TITULO * field("sim_titulo")
+        ) + lex_weight * field("text_score"),
+        k
     )
-    return [_normalize_item(r) for r in qb]
 
-def _hybrid_query(col, q: str, k: int) -> List[Dict[str, Any]]:
-    qn = _norm_spaces(q)
+# a ida ao TopK é imediata; a normalização das linhas é preguiçosa (quem consome decide quantas)
+def _semantic_query(col, nome: str, qn: str, k: int) -> Iterator[Trecho]:
+    rows = col.query(_semantic_expr(qn, k))
+    return (_normalize_item(r, nome) for r in rows)
+
+def _hybrid_query(col, nome: str, consulta, qn: str, k: int) -> Iterator[Trecho]:
     try:
-        qb = col.query(
-            select(
-                "doc_id", TITULO_FIELD, ART_FIELD,
-                PORTARIA_FIELD, ANO_FIELD,
-                TEXT_FIELD, EMENTA_FIELD,
-                sim_texto=fn.semantic_similarity(TEXT_FIELD, qn),
-                sim_ementa=fn.semantic_similarity(EMENTA_FIELD, qn),
-                sim_titulo=fn.semantic_similarity(TITULO_FIELD, qn),
-                text_score=fn.bm25_score(),
-            ).filter(match(qn) | match(_ascii(qn)))
-             .topk(
-                SEM_WEIGHT * (
-                    W_TEXT * field("sim_texto") +
-                    W_EMENTA * field("sim_ementa") +
-                    W_TITULO * field("sim_titulo")
-                ) + LEX_WEIGHT * field("text_score"),
-                k
-             )
-        )
-        return [_normalize_item(r) for r in qb]
+        rows = col.query(consulta)
     except Exception:
-        return _semantic_query(col, q, k)
+        return _semantic_query(col, nome, qn, k)
+    return (_normalize_item(r, nome) for r in rows)
 
 # ==========================================================
-# API PÚBLICA
+# CACHE DE CONSULTAS
 # ==========================================================
-def search_topk_multi(query: str, k: int = 5) -> Dict[str, List[Dict[str, Any]]]:
-    output: Dict[str, List[Dict[str, Any]]] = {}
+_search_cache: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, List[Trecho]]]]" = OrderedDict()
+_search_cache_lock = threading.Lock()
+_search_disk = None
+if diskcache is not None and TOPK_CACHE_DIR:
+    try:
+        _search_disk = diskcache.Cache(TOPK_CACHE_DIR)
+    except Exception as e:
+        print(f"[ERRO cache em disco] {e}")
+
+def _search_cache_get(key: Tuple[str, int]) -> Optional[Dict[str, List[Trecho]]]:
+    with _search_cache_lock:
+        hit = _search_cache.get(key)
+        if hit is not None:
+            ts, output = hit
+            if time.time() - ts <= TOPK_CACHE_TTL:
+                _search_cache.move_to_end(key)
+                # Trecho é imutável; só as listas/dict são copiados
+                return {name: list(hits) for name, hits in output.items()}
+            del _search_cache[key]
+
+    if _search_disk is None:
+        return None
+    try:
+        output = _search_disk.get(key)  # expiração controlada pelo próprio diskcache
+    except Exception as e:
+        print(f"[ERRO cache em disco] {e}")
+        return None
+    if output is not None:
+        _search_cache_put(key, output, disco=False)  # promove para a memória
+    return output
+
+def _search_cache_put(key: Tuple[str, int], output: Dict[str, List[Trecho]], disco: bool = True) -> None:
+    with _search_cache_lock:
+        _search_cache[key] = (time.time(), {name: list(hits) for name, hits in output.items()})
+        _search_cache.move_to_end(key)
+        while len(_search_cache) > TOPK_CACHE_SIZE:
+            _search_cache.popitem(last=False)
+
+    if disco and _search_disk is not None:
+        try:
+            _search_disk.set(key, output, expire=TOPK_CACHE_TTL)
+        except Exception as e:
+            print(f"[ERRO cache em disco] {e}")
 
-    for name, col in _collections.items():
-        results = []
-        if _is_id_like(query):
-            results = _keyword_query(col, query, k)
-        if not results:
-            results = _hybrid_query(col, query, k)
+# ==========================================================
+# CACHE SEMÂNTICO DE CONSULTAS
+# ==========================================================
+class _SemSearchCache:
+    """Embeddings normalizados das consultas + resultados; similaridade por produto interno."""
+
+    def __init__(self, maxsize: int, threshold: float, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl
+        self._mat = None
+        self._ks: List[int] = []
+        self._vals: List[Dict[str, List[Trecho]]] = []
+        self._ts: List[float] = []
+        self._used: List[float] = []
+        self._lock = threading.Lock()
+
+    def get(self, q, k: int) -> Optional[Dict[str, List[Trecho]]]:
+        with self._lock:
+            if self._mat is None or not self._vals:
+                return None
+            agora = time.time()
+            scores = self._mat @ q  # uma multiplicação contra todas as consultas guardadas
+            for i in np.argsort(scores)[::-1]:
+                if scores[i] < self.threshold:
+                    break
+                if self._ks[i] == k and agora - self._ts[i] <= self.ttl:
+                    self._used[i] = agora
+                    return {name: list(hits) for name, hits in self._vals[i].items()}
+            return None
+
+    def put(self, q, k: int, output: Dict[str, List[Trecho]]) -> None:
+        with self._lock:
+            agora = time.time()
+            if self._mat is None:
+                self._mat = q[np.newaxis, :]
+            else:
+                if len(self._vals) >= self.maxsize:
+                    lru = int(np.argmin(self._used))
+                    self._mat = np.delete(self._mat, lru, axis=0)
+                    del self._ks[lru], self._vals[lru], self._ts[lru], self._used[lru]
+                self._mat = np.vstack([self._mat, q])
+            self._ks.append(k)
+            self._vals.append({name: list(hits) for name, hits in output.items()})
+            self._ts.append(agora)
+            self._used.append(agora)
+
+_sem_search_cache = _SemSearchCache(TOPK_SEM_CACHE_SIZE, TOPK_SEM_CACHE_THRESHOLD, TOPK_CACHE_TTL)
+
+def _embed_consulta(qn: str):
+    from embed_cache import embed  # import tardio: embed_cache -> llm_client -> topk_client
+    v = embed(qn)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
 
-        sane = [r for r in results if r["trecho"]]
-        if sane:
-            for r in sane:
-                r["fonte_colecao"] = name
-            output[name] = _dedupe(sane)[:k]
+# ==========================================================
+# API PÚBLICA
+# ==========================================================
+def _query_one(name: str, col, consulta, qn: str, k: int) -> List[Trecho]:
+    try:
+        # uma ida ao TopK por coleção
+        results = _hybrid_query(col, name, consulta, qn, k)
+        # normaliza -> filtra vazios -> dedup -> k primeiros numa passada só;
+        # dentro do try porque a normalização só roda aqui
+        hits = list(islice(_dedupe(r for r in results if r.trecho), k))
+    except Exception as e:
+        _dbg(f"[{name}] falha na consulta: {e}")
+        return []
 
-        _dbg(f"[{name}] {len(sane)} resultados")
+    _dbg(f"[{name}] {len(hits)} resultados")
+    return hits
+
+def _liberar_presa(_fut) -> None:
+    global _presas
+    with _pool_lock:
+        _presas -= 1
+
+def _trocar_pool(novas_presas: int) -> None:
+    global _pool, _presas
+    with _pool_lock:
+        _presas += novas_presas
+        if _presas > TOPK_MAX_PRESAS:
+            _dbg(f"{_presas} consultas presas; pool mantido")
+            return
+        antigo, _pool = _pool, _novo_pool()
+    antigo.shutdown(wait=False)  # threads presas terminam sozinhas quando a RPC voltar
+
+def _submeter(pares: List[Tuple[str, Any]], consulta: Any, qn: str, k: int) -> List[Tuple[str, Any]]:
+    # leitura + submit sob o lock: outra busca pode trocar (e desligar) o pool entre os dois
+    with _pool_lock:
+        return [(name, _pool.submit(_query_one, name, col, consulta, qn, k)) for name, col in pares]
+
+def _coletar(futures: List[Tuple[str, Any]], deadline: Optional[float],
+             output: Dict[str, List[Trecho]]) -> bool:
+    # resultados na ordem das coleções, independente de quem responde primeiro;
+    # o prazo vale para a busca inteira, não por coleção
+    completa = True
+    presas = 0
+    for name, fut in futures:
+        try:
+            hits = fut.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except _FutureTimeout:
+            _dbg(f"[{name}] sem resposta no prazo ({TOPK_QUERY_TIMEOUT}s)")
+            completa = False
+            if not fut.cancel():
+                # já rodando: ocupa a thread até a RPC voltar
+                presas += 1
+                fut.add_done_callback(_liberar_presa)
+            continue
+        if hits:
+            output[name] = hits
+    if presas:
+        _trocar_pool(presas)
+    return completa
+
+def search_topk_multi(query: str, k: int = 5) -> Dict[str, List[Trecho]]:
+    output: Dict[str, List[Trecho]] = {}
+
+    if len(_collections) < len(TOPK_COLLECTIONS):
+        # init falhou/parcial no import: tenta de novo reaproveitando o client
+        try:
+            _init()  # idempotente e serializado: só carrega o que falta
+        except Exception as e:
+            _dbg(f"Falha ao reinicializar TopK: {e}")
+
+    qn = _norm_spaces(query)
+    cache_key = (qn, k)
+    if TOPK_CACHE_SIZE > 0:
+        cached = _search_cache_get(cache_key)
+        if cached is not None:
+            _dbg("cache hit")
+            return cached
+
+    # normalizações da consulta: uma vez por busca, não por coleção
+    qn_ascii = _ascii(qn)
+    id_like = _is_id_like(query)
+
+    if not _collections:
+        return output
+
+    # cache semântico só sem número: "portaria 277" e "portaria 278" têm embeddings quase iguais
+    q_vec = None
+    if TOPK_SEM_CACHE_SIZE > 0 and np is not None and not id_like:
+        try:
+            q_vec = _embed_consulta(qn)
+        except Exception as e:
+            _dbg(f"Falha no embedding da consulta: {e}")
+        if q_vec is not None:
+            cached = _sem_search_cache.get(q_vec, k)
+            if cached is not None:
+                _dbg("cache semântico hit")
+                return cached
+
+    # com número na pergunta o BM25 pesa mais; mesma expressão para todas as coleções
+    try:
+        consulta = _hybrid_expr(qn, qn_ascii, k, LEX_WEIGHT_ID if id_like else LEX_WEIGHT)
+    except Exception as e:
+        _dbg(f"Falha ao montar consulta: {e}")
+        return output
+
+    deadline = time.monotonic() + TOPK_QUERY_TIMEOUT if TOPK_QUERY_TIMEOUT > 0 else None
+    pares = list(_collections.items())
+
+    futures = _submeter(pares, consulta, qn, k)
+
+    # pergunta com número e tipo de ato: se a coleção do tipo responder com trechos no
+    # prazo, a resposta é só ela, sem esperar as demais. O fan-out já foi submetido junto,
+    # então se ela vier vazia ou atrasar o resultado é o mesmo do fan-out normal.
+    alvo = _tipo_ato(qn) if (id_like and TOPK_TIPO_PRIMEIRO) else None
+    if alvo in _collections:
+        fut_alvo = next(fut for name, fut in futures if name == alvo)
+        try:
+            hits = fut_alvo.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except _FutureTimeout:
+            hits = None  # o _coletar abaixo trata o atraso como no fan-out normal
+        if hits:
+            for name, fut in futures:
+                if fut is not fut_alvo:
+                    fut.cancel()  # as já em andamento terminam sozinhas; resultado descartado
+            output[alvo] = hits
+            if TOPK_CACHE_SIZE > 0:
+                _search_cache_put(cache_key, output)
+            return output
+
+    completa = _coletar(futures, deadline, output)
+
+    # só guarda com todas as coleções carregadas e respondidas (parcial não fica em cache)
+    if output and completa and len(_collections) == len(TOPK_COLLECTIONS):
+        if TOPK_CACHE_SIZE > 0:
+            _search_cache_put(cache_key, output)
+        if q_vec is not None:
+            _sem_search_cache.put(q_vec, k, output)
 
     return output
 